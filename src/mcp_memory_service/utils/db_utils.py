@@ -4,18 +4,88 @@ Copyright (c) 2024 Heinrich Krupp
 Licensed under the MIT License. See LICENSE file in the project root for full license text.
 """
 
+import asyncio
 import logging
 import os
 import shutil
+import subprocess
+import sys
 import json
-from typing import Tuple, Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+from collections import Counter
+from itertools import chain
+from operator import methodcaller
+from typing import Tuple, Dict, Any, Iterable, Iterator, List, Optional
 import time
 from datetime import datetime
 
+import numpy as np
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
 from ..storage.chroma import ChromaMemoryStorage
 
 logger = logging.getLogger(__name__)
 
+# Number of entries fetched per request when scanning the whole collection
+STATS_CHUNK_SIZE = 10000
+
+# Statistics get_database_stats can compute
+STATS_FIELDS = frozenset({"count", "content_length", "types", "tags", "timestamps"})
+
+# Seconds a collection count is reused by validate_database
+COUNT_CACHE_TTL = 5.0
+
+# Cached collection counts as (time counted, count), keyed by collection id
+_COUNT_CACHE: Dict[int, Tuple[float, int]] = {}
+
+# Metadata field getters, mapped over a whole chunk at once
+_get_memory_type = methodcaller("get", "memory_type", "")
+_get_tags = methodcaller("get", "tags", "[]")
+_get_timestamp = methodcaller("get", "timestamp")
+
+def fast_snapshot(src: str, dst: str) -> None:
+    """Copy the contents of directory src into directory dst.
+    
+    On Linux and macOS, cp is asked to clone files copy-on-write, which
+    only copies metadata on filesystems that support it (Btrfs, XFS, APFS).
+    If that isn't possible, files are copied in parallel with shutil.copy2.
+    
+    Args:
+        src: Directory to copy
+        dst: Directory to copy into, created if it doesn't exist
+    """
+    os.makedirs(dst, exist_ok=True)
+    
+    if sys.platform.startswith('linux'):
+        command = ["cp", "-a", "--reflink=auto", os.path.join(src, "."), dst]
+    elif sys.platform == 'darwin':
+        command = ["cp", "-a", "-c", os.path.join(src, "."), dst]
+    else:
+        command = None
+    
+    if command:
+        try:
+            subprocess.run(command, check=True, capture_output=True)
+            return
+        except (OSError, subprocess.CalledProcessError) as e:
+            logger.warning(f"Clone copy of {src} failed, falling back to file copy: {str(e)}")
+    
+    # Collect the files to copy, recreating the directory structure as we go
+    files = []
+    for root, _, filenames in os.walk(src):
+        target_dir = os.path.normpath(os.path.join(dst, os.path.relpath(root, src)))
+        os.makedirs(target_dir, exist_ok=True)
+        files.extend((os.path.join(root, name), os.path.join(target_dir, name)) for name in filenames)
+    
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+        # Consume the results so any copy error is raised here
+        list(executor.map(lambda paths: shutil.copy2(*paths), files))
+
 async def validate_database(storage: ChromaMemoryStorage) -> Tuple[bool, str]:
     """Validate the database health.
     
@@ -29,8 +99,15 @@ async def validate_database(storage: ChromaMemoryStorage) -> Tuple[bool, str]:
         # Basic validation - check if we can get collection info
         collection = storage.collection
         
-        # Try to get count of items
-        count = collection.count()
+        # Try to get count of items, reusing a recent count so frequent
+        # health checks don't hit the database every time
+        now = time.monotonic()
+        cached = _COUNT_CACHE.get(id(collection))
+        if cached and now - cached[0] < COUNT_CACHE_TTL:
+            count = cached[1]
+        else:
+            count = collection.count()
+            _COUNT_CACHE[id(collection)] = (now, count)
         
         # If we got here, basic functions are working
         return True, f"Database validated successfully. Contains {count} memories."
@@ -41,6 +118,10 @@ async def validate_database(storage: ChromaMemoryStorage) -> Tuple[bool, str]:
 async def repair_database(storage: ChromaMemoryStorage) -> Tuple[bool, str]:
     """Attempt to repair database issues.
     
+    The backup copy and collection re-initialization run in a worker
+    thread. Running them on the event loop blocked every other request
+    until the whole database had been copied.
+    
     Args:
         storage: The ChromaMemoryStorage instance
         
@@ -55,20 +136,19 @@ async def repair_database(storage: ChromaMemoryStorage) -> Tuple[bool, str]:
         os.makedirs(backup_path, exist_ok=True)
         
         # Copy database files to backup
-        for item in os.listdir(CHROMA_PATH):
-            item_path = os.path.join(CHROMA_PATH, item)
-            if os.path.isfile(item_path):
-                shutil.copy2(item_path, backup_path)
-            elif os.path.isdir(item_path):
-                shutil.copytree(item_path, os.path.join(backup_path, item))
+        await asyncio.to_thread(fast_snapshot, CHROMA_PATH, backup_path)
         
         # Re-initialize collection
-        storage.collection = storage.client.get_or_create_collection(
+        storage.collection = await asyncio.to_thread(
+            storage.client.get_or_create_collection,
             name="memory_collection",
             metadata={"hnsw:space": "cosine"},
             embedding_function=storage.embedding_function
         )
         
+        # Make sure validation below counts the re-initialized collection
+        _COUNT_CACHE.clear()
+        
         # Validate after repair
         is_valid, message = await validate_database(storage)
         if is_valid:
@@ -79,83 +159,192 @@ async def repair_database(storage: ChromaMemoryStorage) -> Tuple[bool, str]:
         logger.error(f"Database repair error: {str(e)}")
         return False, f"Database repair failed: {str(e)}"
 
-def get_database_stats(storage: ChromaMemoryStorage) -> Dict[str, Any]:
+def parse_tags(tag_data: Any) -> List[str]:
+    """Parse stored tags, either a list or a JSON-encoded list.
+    
+    Args:
+        tag_data: The tags value from a memory's metadata
+        
+    Returns:
+        List of tags, empty if they are missing or malformed. Elements that
+        aren't strings are dropped.
+    """
+    if not isinstance(tag_data, list):
+        try:
+            tag_data = _json_loads(tag_data) if isinstance(tag_data, str) else []
+        except (ValueError, TypeError):
+            return []
+        if not isinstance(tag_data, list):
+            return []
+    return [tag for tag in tag_data if isinstance(tag, str)]
+
+def _parse_timestamp(timestamp_str: Any) -> float:
+    """Parse a stored timestamp, returning NaN if it is missing or invalid."""
+    if not timestamp_str:
+        return np.nan
+    try:
+        return float(timestamp_str)
+    except (TypeError, ValueError):
+        return np.nan
+
+def _parse_timestamps(values: List[Any]) -> np.ndarray:
+    """Parse stored timestamps into a float array, with NaN for invalid ones."""
+    try:
+        # NumPy parses numeric strings and maps missing values to NaN itself
+        timestamps = np.array(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        return np.array([_parse_timestamp(value) for value in values], dtype=np.float64)
+    
+    # Falsy values such as 0 count as missing, as in _parse_timestamp. Only
+    # they can parse to zero, so just the zeros need checking.
+    for i in np.flatnonzero(timestamps == 0):
+        if not values[i]:
+            timestamps[i] = np.nan
+    return timestamps
+
+def _format_timestamp(timestamp: float) -> Optional[str]:
+    """Format a timestamp as an ISO date, or None if it is out of range."""
+    try:
+        return datetime.fromtimestamp(timestamp).isoformat()
+    except (OverflowError, OSError, ValueError):
+        return None
+
+def _iter_collection(collection: Any, include: List[str], chunk_size: int = STATS_CHUNK_SIZE) -> Iterator[Dict[str, Any]]:
+    """Yield the entries of a collection in chunks of at most chunk_size.
+    
+    Args:
+        collection: The ChromaDB collection to read
+        include: Fields to fetch for each entry
+        chunk_size: Maximum number of entries per chunk
+        
+    Yields:
+        Results of collection.get for each chunk
+    """
+    offset = 0
+    while True:
+        batch = collection.get(include=include, limit=chunk_size, offset=offset)
+        if batch["ids"]:
+            yield batch
+        if len(batch["ids"]) < chunk_size:
+            return
+        offset += chunk_size
+
+async def get_database_stats(storage: ChromaMemoryStorage,
+                             fields: Optional[Iterable[str]] = None) -> Dict[str, Any]:
     """Get detailed statistics about the database.
     
+    Entries are read in chunks of STATS_CHUNK_SIZE so memory use stays
+    bounded regardless of the size of the collection. The scan runs in a
+    worker thread so it doesn't block the event loop.
+    
+    Only the requested fields are computed. Documents are only fetched for
+    "content_length" and metadata only for "types", "tags" and
+    "timestamps". If just "count" is requested the collection isn't
+    scanned at all.
+    
     Args:
         storage: The ChromaMemoryStorage instance
+        fields: Statistics to compute, any of STATS_FIELDS. Defaults to all.
         
     Returns:
         Dictionary of statistics
     """
+    return await asyncio.to_thread(_get_database_stats_sync, storage, fields)
+
+def _get_database_stats_sync(storage: ChromaMemoryStorage,
+                             fields: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+    """Compute database statistics, blocking until the scan completes."""
     try:
+        # A bare string would otherwise be split into single characters
+        if isinstance(fields, str):
+            raise ValueError(f"fields must be a collection of field names, not the string '{fields}'")
+        fields = STATS_FIELDS if fields is None else frozenset(fields)
+        unknown = fields - STATS_FIELDS
+        if unknown:
+            raise ValueError(f"Unknown stats fields: {', '.join(sorted(unknown))}")
+        
         collection = storage.collection
         
-        # Get basic count
-        count = collection.count()
+        # Initialize stats
+        stats = {}
+        if "count" in fields:
+            # Get basic count
+            stats["total_memories"] = collection.count()
+        if "content_length" in fields:
+            stats["total_content_length"] = 0
+            stats["avg_content_length"] = 0
+        if "types" in fields:
+            stats["memory_types"] = {}
+        if "tags" in fields:
+            stats["tags"] = {}
+        if "timestamps" in fields:
+            stats["oldest_memory"] = None
+            stats["newest_memory"] = None
+        stats["collection_name"] = "memory_collection"
+        stats["embedding_model"] = "all-MiniLM-L6-v2"
+        
+        # The count alone doesn't need a scan
+        if not fields - {"count"}:
+            return stats
         
-        # Get all entries to analyze
-        results = collection.get(
-            include=["metadatas", "documents"]
-        )
+        type_counter = Counter()
+        tag_counter = Counter()
+        oldest_timestamp = np.inf
+        newest_timestamp = -np.inf
+        rows_seen = 0
         
-        # Initialize stats
-        stats = {
-            "total_memories": count,
-            "total_content_length": 0,
-            "avg_content_length": 0,
-            "memory_types": {},
-            "tags": {},
-            "oldest_memory": None,
-            "newest_memory": None,
-            "collection_name": "memory_collection",
-            "embedding_model": "all-MiniLM-L6-v2"
-        }
-        
-        # Process metadata
-        if results["ids"]:
-            oldest_timestamp = float('inf')
-            newest_timestamp = 0
+        # Only fetch the columns the requested fields are computed from
+        include = []
+        if fields & {"types", "tags", "timestamps"}:
+            include.append("metadatas")
+        if "content_length" in fields:
+            include.append("documents")
+        
+        # Process each chunk as whole columns instead of row by row
+        for batch in _iter_collection(collection, include):
+            metadatas = batch.get("metadatas")
+            rows_seen += len(batch["ids"])
+            
+            # Content stats
+            if "content_length" in fields:
+                documents = batch["documents"]
+                lengths = np.fromiter(map(len, documents), dtype=np.int64, count=len(documents))
+                stats["total_content_length"] += int(lengths.sum())
+            
+            # Memory type stats
+            if "types" in fields:
+                type_counter.update(map(_get_memory_type, metadatas))
             
-            for i, metadata in enumerate(results["metadatas"]):
-                # Content stats
-                content_length = len(results["documents"][i])
-                stats["total_content_length"] += content_length
-                
-                # Memory type stats
-                memory_type = metadata.get("memory_type", "")
-                stats["memory_types"][memory_type] = stats["memory_types"].get(memory_type, 0) + 1
-                
-                # Tag stats
-                try:
-                    tags_str = metadata.get("tags", "[]")
-                    tags = json.loads(tags_str) if isinstance(tags_str, str) else []
-                    for tag in tags:
-                        stats["tags"][tag] = stats["tags"].get(tag, 0) + 1
-                except (json.JSONDecodeError, TypeError):
-                    pass
-                
-                # Timestamp stats
-                timestamp_str = metadata.get("timestamp")
-                if timestamp_str:
-                    try:
-                        timestamp = float(timestamp_str)
-                        if timestamp < oldest_timestamp:
-                            oldest_timestamp = timestamp
-                            stats["oldest_memory"] = datetime.fromtimestamp(timestamp).isoformat()
-                        if timestamp > newest_timestamp:
-                            newest_timestamp = timestamp
-                            stats["newest_memory"] = datetime.fromtimestamp(timestamp).isoformat()
-                    except ValueError:
-                        pass
+            # Tag stats
+            if "tags" in fields:
+                tag_counter.update(chain.from_iterable(map(parse_tags, map(_get_tags, metadatas))))
+            
+            # Timestamp stats, converted to dates once for the extremes only
+            if "timestamps" in fields:
+                timestamps = _parse_timestamps(list(map(_get_timestamp, metadatas)))
+                timestamps = timestamps[np.isfinite(timestamps)]
+                if timestamps.size:
+                    oldest_timestamp = min(oldest_timestamp, timestamps.min())
+                    newest_timestamp = max(newest_timestamp, timestamps.max())
+        
+        if "types" in fields:
+            stats["memory_types"] = dict(type_counter)
+        if "tags" in fields:
+            stats["tags"] = dict(tag_counter)
+        
+        if rows_seen:
+            if np.isfinite(oldest_timestamp):
+                stats["oldest_memory"] = _format_timestamp(oldest_timestamp)
+                stats["newest_memory"] = _format_timestamp(newest_timestamp)
             
-            # Calculate average
-            if count > 0:
-                stats["avg_content_length"] = stats["total_content_length"] / count
+            # Calculate average over the entries actually measured, which
+            # can differ from count if memories change during the scan
+            if "content_length" in fields:
+                stats["avg_content_length"] = stats["total_content_length"] / rows_seen
             
-            # Sort and limit tag counts for readability
-            sorted_tags = sorted(stats["tags"].items(), key=lambda x: x[1], reverse=True)
-            stats["top_tags"] = dict(sorted_tags[:10]) if len(sorted_tags) > 10 else dict(sorted_tags)
+            # Limit tag counts for readability
+            if "tags" in fields:
+                stats["top_tags"] = dict(tag_counter.most_common(10))
         
         return stats
     except Exception as e:
@@ -7,10 +7,18 @@ Licensed under the MIT License. See LICENSE file in the project root for full li
 import logging
 import time
 from typing import Dict, Any, List, Optional
-import json
+
+import numpy as np
+
+try:
+    import simsimd
+except ImportError:
+    simsimd = None
 
 from ..storage.chroma import ChromaMemoryStorage
 from ..models.memory import Memory, MemoryQueryResult
+from .db_utils import parse_tags
+from .embed_cache import embedding_cache, encode_many_cached
 
 logger = logging.getLogger(__name__)
 
@@ -25,16 +33,24 @@ def get_raw_embedding(storage: ChromaMemoryStorage, content: str) -> Dict[str, A
         Dictionary with embedding information
     """
     try:
-        # Time embedding generation
-        start_time = time.time()
-        embedding = storage.model.encode(content)
-        end_time = time.time()
+        # Time embedding generation, which only runs the model on a cache miss
+        embedding = embedding_cache.get("all-MiniLM-L6-v2", content)
+        cached = embedding is not None
+        embedding_time = 0.0
+        if not cached:
+            start_time = time.time()
+            embedding = storage.model.encode(content, convert_to_numpy=True, normalize_embeddings=False)
+            end_time = time.time()
+            embedding = embedding_cache.put("all-MiniLM-L6-v2", content, embedding)
+            embedding_time = round(end_time - start_time, 4)
         
         return {
-            "embedding_time": round(end_time - start_time, 4),
+            "embedding_time": embedding_time,
+            "cached": cached,
             "embedding_dimensions": len(embedding),
             "embedding_model": "all-MiniLM-L6-v2",
             "embedding_sample": embedding[:5].tolist(),  # Just show first 5 values
+            "embedding_cache": embedding_cache.stats(),
             "content_preview": content[:100] + "..." if len(content) > 100 else content
         }
     except Exception as e:
@@ -54,9 +70,10 @@ def check_embedding_model(storage: ChromaMemoryStorage) -> Dict[str, Any]:
         # Try to embed a simple test string
         test_string = "This is a test string for embedding."
         
-        # Time embedding generation
+        # Time embedding generation, bypassing the embedding cache so the
+        # model itself is exercised
         start_time = time.time()
-        embedding = storage.model.encode(test_string)
+        embedding = storage.model.encode(test_string, convert_to_numpy=True, normalize_embeddings=False)
         end_time = time.time()
         
         return {
@@ -64,7 +81,8 @@ def check_embedding_model(storage: ChromaMemoryStorage) -> Dict[str, Any]:
             "model": "all-MiniLM-L6-v2",
             "embedding_dimensions": len(embedding),
             "embedding_time": round(end_time - start_time, 4),
-            "device": str(storage.model.device)
+            "device": str(storage.model.device),
+            "embedding_cache": embedding_cache.stats()
         }
     except Exception as e:
         logger.error(f"Error checking embedding model: {str(e)}")
@@ -73,64 +91,136 @@ def check_embedding_model(storage: ChromaMemoryStorage) -> Dict[str, Any]:
             "error": str(e)
         }
 
-async def debug_retrieve_memory(storage: ChromaMemoryStorage, query: str, n_results: int = 5,
-                              similarity_threshold: float = 0.0) -> List[MemoryQueryResult]:
-    """Retrieve memories with additional debug information.
+def recompute_similarity(query_vec: np.ndarray, doc_vecs: np.ndarray) -> np.ndarray:
+    """Compute the cosine similarity between a query vector and each document vector.
+    
+    Uses SimSIMD's SIMD kernels when it is installed, NumPy otherwise.
+    
+    Args:
+        query_vec: Query embedding of shape (dims,)
+        doc_vecs: Document embeddings of shape (n, dims)
+        
+    Returns:
+        Array of n similarity scores
+    """
+    if len(doc_vecs) == 0:
+        return np.empty(0, dtype=np.float32)
+    if simsimd is not None:
+        distances = np.asarray(simsimd.cdist(query_vec[np.newaxis, :], doc_vecs, metric="cosine"))
+        return 1 - distances[0]
+    norms = np.linalg.norm(doc_vecs, axis=1) * np.linalg.norm(query_vec)
+    return doc_vecs @ query_vec / np.where(norms == 0, 1, norms)
+
+async def debug_retrieve_memories(storage: ChromaMemoryStorage, queries: List[str], n_results: int = 5,
+                                  similarity_threshold: float = 0.0,
+                                  rescore: bool = False) -> List[List[MemoryQueryResult]]:
+    """Retrieve memories for a batch of queries with additional debug information.
+    
+    All queries are embedded in one model call and searched in one
+    collection query, which is much faster than querying one at a time.
+    Keep batches small enough to embed in about 0.1s so a single call
+    doesn't hold up other requests.
+    
+    Results are filtered on the similarity Chroma reports, which is already
+    exact for the candidates it returns. With rescore, the candidate
+    embeddings are fetched too and similarities are recomputed from them,
+    for checking the index or comparing similarity measures.
     
     Args:
         storage: The storage implementation
-        query: The search query
-        n_results: Maximum number of results to return
+        queries: The search queries
+        n_results: Maximum number of results to return per query
         similarity_threshold: Minimum similarity score threshold
+        rescore: Recompute similarities from the candidate embeddings
         
     Returns:
-        List of memory query results with debug info
+        List of memory query results with debug info for each query
     """
+    if not queries:
+        return []
+    
     try:
-        # Query using the embedding function with include_distances=True
+        # Embed the queries through the cache so repeated queries skip the model
+        query_embeddings, cached = encode_many_cached(storage.model, queries, "all-MiniLM-L6-v2")
+        cache_stats = embedding_cache.stats()
+        
+        # Only fetch candidate embeddings when they're needed for rescoring
+        include = ["documents", "metadatas", "distances"]
+        if rescore:
+            include.append("embeddings")
+        
+        # Query with the precomputed embeddings, including distances
         results = storage.collection.query(
-            query_texts=[query],
+            query_embeddings=[embedding.tolist() for embedding in query_embeddings],
             n_results=n_results,
-            include=["documents", "metadatas", "distances"]
+            include=include
         )
         
-        if not results["ids"] or not results["ids"][0]:
-            return []
+        if not results["ids"]:
+            return [[] for _ in queries]
         
-        memory_results = []
-        for i in range(len(results["ids"][0])):
-            metadata = results["metadatas"][0][i]
-            
-            # Create memory object
-            memory = Memory(
-                content=results["documents"][0][i],
-                content_hash=metadata.get("content_hash", ""),
-                tags=metadata.get("tags", []),
-                memory_type=metadata.get("memory_type", ""),
-            )
-            
-            # Calculate cosine similarity from distance
-            distance = results["distances"][0][i]
-            similarity = 1 - distance
-            
-            # Skip if below threshold
-            if similarity < similarity_threshold:
-                continue
-            
-            # Create debug info
-            debug_info = {
-                "raw_distance": distance,
-                "raw_similarity": similarity,
-                "memory_id": results["ids"][0][i],
-                "embedding_model": "all-MiniLM-L6-v2"
-            }
-            
-            memory_results.append(MemoryQueryResult(memory, similarity, debug_info=debug_info))
+        batch_results = []
+        for q in range(len(queries)):
+            memory_results = []
+            if rescore:
+                doc_vecs = np.asarray(results["embeddings"][q], dtype=np.float32)
+                rescored = recompute_similarity(query_embeddings[q], doc_vecs)
+            for i in range(len(results["ids"][q])):
+                # Calculate cosine similarity from distance
+                distance = results["distances"][q][i]
+                raw_similarity = 1 - distance
+                similarity = float(rescored[i]) if rescore else raw_similarity
+                
+                # Skip if below threshold
+                if similarity < similarity_threshold:
+                    continue
+                
+                # Create memory object, parsing tags only for kept results
+                metadata = results["metadatas"][q][i]
+                memory = Memory(
+                    content=results["documents"][q][i],
+                    content_hash=metadata.get("content_hash", ""),
+                    tags=parse_tags(metadata.get("tags", [])),
+                    memory_type=metadata.get("memory_type", ""),
+                )
+                
+                # Create debug info
+                debug_info = {
+                    "raw_distance": distance,
+                    "raw_similarity": raw_similarity,
+                    "memory_id": results["ids"][q][i],
+                    "embedding_model": "all-MiniLM-L6-v2",
+                    "query_embedding_cached": cached[q],
+                    "embedding_cache": cache_stats
+                }
+                if rescore:
+                    debug_info["rescored_similarity"] = similarity
+                
+                memory_results.append(MemoryQueryResult(memory, similarity, debug_info=debug_info))
+            batch_results.append(memory_results)
         
-        return memory_results
+        return batch_results
     except Exception as e:
         logger.error(f"Error in debug retrieve: {str(e)}")
-        return []
+        return [[] for _ in queries]
+
+async def debug_retrieve_memory(storage: ChromaMemoryStorage, query: str, n_results: int = 5,
+                              similarity_threshold: float = 0.0,
+                              rescore: bool = False) -> List[MemoryQueryResult]:
+    """Retrieve memories with additional debug information.
+    
+    Args:
+        storage: The storage implementation
+        query: The search query
+        n_results: Maximum number of results to return
+        similarity_threshold: Minimum similarity score threshold
+        rescore: Recompute similarities from the candidate embeddings
+        
+    Returns:
+        List of memory query results with debug info
+    """
+    results = await debug_retrieve_memories(storage, [query], n_results, similarity_threshold, rescore)
+    return results[0]
 
 async def exact_match_retrieve(storage: ChromaMemoryStorage, content: str) -> List[Memory]:
     """Retrieve memories using exact content match.
@@ -143,39 +233,40 @@ async def exact_match_retrieve(storage: ChromaMemoryStorage, content: str) -> Li
         List of matching memories
     """
     try:
-        # Get all documents
-        results = storage.collection.get(
-            include=["documents", "metadatas"]
-        )
+        # Let ChromaDB narrow the candidates to documents containing the
+        # content. Hashes can't be used here because stored hashes also
+        # cover the metadata. Fall back to reading every document only if
+        # the filter is rejected: ChromaDB raises ValueError for an invalid
+        # filter such as an empty $contains, and versions without document
+        # filters raise TypeError for the argument. Other errors propagate.
+        try:
+            results = storage.collection.get(
+                where_document={"$contains": content},
+                include=["documents", "metadatas"]
+            )
+        except (TypeError, ValueError) as e:
+            logger.warning(f"Document filter rejected, scanning all documents: {str(e)}")
+            results = storage.collection.get(
+                include=["documents", "metadatas"]
+            )
         
         if not results["ids"]:
             return []
         
-        # Find exact matches
+        # Find exact matches, comparing all candidates in one NumPy pass
+        documents = np.asarray(results["documents"], dtype=object)
         matches = []
-        for i, doc in enumerate(results["documents"]):
-            if doc == content:
-                metadata = results["metadatas"][i]
-                
-                # Parse tags if stored as JSON string
-                tags = []
-                if "tags" in metadata:
-                    tag_data = metadata["tags"]
-                    if isinstance(tag_data, str):
-                        try:
-                            tags = json.loads(tag_data)
-                        except json.JSONDecodeError:
-                            tags = []
-                    elif isinstance(tag_data, list):
-                        tags = tag_data
-                
-                memory = Memory(
-                    content=doc,
-                    content_hash=metadata.get("content_hash", ""),
-                    tags=tags,
-                    memory_type=metadata.get("memory_type", ""),
-                )
-                matches.append(memory)
+        for i in np.flatnonzero(documents == content):
+            metadata = results["metadatas"][i]
+            
+            # Parse tags only for matching rows
+            memory = Memory(
+                content=results["documents"][i],
+                content_hash=metadata.get("content_hash", ""),
+                tags=parse_tags(metadata.get("tags", [])),
+                memory_type=metadata.get("memory_type", ""),
+            )
+            matches.append(memory)
         
         return matches
     except Exception as e:
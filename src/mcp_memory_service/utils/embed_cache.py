@@ -0,0 +1,113 @@
+"""
+MCP Memory Service
+Copyright (c) 2024 Heinrich Krupp
+Licensed under the MIT License. See LICENSE file in the project root for full license text.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+
+from .hashing import get_hasher
+
+# Cache keys never leave the process, so use the fastest available hash
+# regardless of HASH_ALGO
+try:
+    _hasher = get_hasher('blake3')
+except ValueError:
+    _hasher = get_hasher('sha256')
+
+# Return numpy arrays directly and skip normalization, matching what the
+# collection's embedding function produces for stored documents
+_ENCODE_KWARGS = {"convert_to_numpy": True, "normalize_embeddings": False}
+
+class EmbeddingCache:
+    """Process-local LRU cache of embeddings keyed by a hash of model name and text."""
+    
+    def __init__(self, maxsize: int = 10000):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def _key(model_name: str, text: str) -> bytes:
+        hasher = _hasher(model_name.encode('utf-8'))
+        hasher.update(b'\0')
+        hasher.update(text.encode('utf-8'))
+        return hasher.digest()
+    
+    def get(self, model_name: str, text: str) -> Optional[np.ndarray]:
+        """Return the cached embedding for text, or None if it isn't cached."""
+        key = self._key(model_name, text)
+        with self._lock:
+            embedding = self._entries.get(key)
+            if embedding is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return embedding
+    
+    def put(self, model_name: str, text: str, embedding: np.ndarray) -> np.ndarray:
+        """Cache an embedding for text and return the cached array."""
+        # Model output is already float32, so this doesn't copy it
+        embedding = np.asarray(embedding, dtype=np.float32)
+        # Cached arrays are shared between callers, so they must not be modified
+        embedding.setflags(write=False)
+        key = self._key(model_name, text)
+        with self._lock:
+            self._entries[key] = embedding
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return embedding
+    
+    def clear(self) -> None:
+        """Remove all cached embeddings and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+    
+    def stats(self) -> Dict[str, Any]:
+        """Return the size and hit rate of the cache."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+embedding_cache = EmbeddingCache()
+
+def encode_many_cached(model: Any, texts: List[str], model_name: str) -> Tuple[List[np.ndarray], List[bool]]:
+    """Encode a batch of texts, running the model once for all uncached texts.
+    
+    Args:
+        model: The sentence transformer model
+        texts: Texts to embed
+        model_name: Name of the model, part of the cache key
+        
+    Returns:
+        Tuple of (read-only float32 embedding vectors, whether each one was
+        cached), both in the same order as texts
+    """
+    embeddings = [embedding_cache.get(model_name, text) for text in texts]
+    cached = [embedding is not None for embedding in embeddings]
+    missing = [i for i, hit in enumerate(cached) if not hit]
+    if missing:
+        # Encode each distinct uncached text once. Rows are copied out of
+        # the batch array so evicting one entry frees its memory.
+        missing_texts = list(dict.fromkeys(texts[i] for i in missing))
+        batch = model.encode(missing_texts, **_ENCODE_KWARGS)
+        encoded = {text: np.array(row, dtype=np.float32) for text, row in zip(missing_texts, batch)}
+        for i in missing:
+            embeddings[i] = embedding_cache.put(model_name, texts[i], encoded[texts[i]])
+    return embeddings, cached
@@ -6,33 +6,111 @@ Licensed under the MIT License. See LICENSE file in the project root for full li
 
 import hashlib
 import json
-from typing import Dict, Any, Union
+import logging
+import os
+from typing import Callable, Dict, Any, Iterable, List, Tuple, Union
 
-def generate_content_hash(content: str, metadata: Union[Dict[str, Any], None] = None) -> str:
+try:
+    import blake3
+except ImportError:
+    blake3 = None
+
+logger = logging.getLogger(__name__)
+
+# Hash constructors by algorithm name. Both produce 64-character hex digests,
+# so hashes from either algorithm fit the same content_hash field.
+_HASHERS = {'sha256': hashlib.sha256}
+if blake3 is not None:
+    _HASHERS['blake3'] = blake3.blake3
+
+# Algorithm used for newly generated hashes. SHA-256 stays the default so
+# hashes of existing memories keep matching; set MCP_MEMORY_HASH_ALGO=blake3
+# (with the blake3 package installed) for faster hashing on ingest. Lookups
+# by hash must then match against content_hash_candidates, since memories
+# stored earlier keep their SHA-256 hashes.
+HASH_ALGO = os.getenv('MCP_MEMORY_HASH_ALGO', 'sha256').lower()
+if HASH_ALGO not in _HASHERS:
+    logger.warning(f"Hash algorithm '{HASH_ALGO}' is not available, falling back to sha256")
+    HASH_ALGO = 'sha256'
+
+def get_hasher(algo: str) -> Callable[..., Any]:
+    """Return the hash constructor for an algorithm name.
+    
+    Raises ValueError if the algorithm is unknown or its package isn't
+    installed.
+    
+    Args:
+        algo: Algorithm name, case-insensitive
+        
+    Returns:
+        A hashlib-style constructor taking optional initial bytes
+    """
+    try:
+        return _HASHERS[algo.lower()]
+    except KeyError:
+        raise ValueError(f"Hash algorithm '{algo}' is not available, expected one of: {', '.join(sorted(_HASHERS))}") from None
+
+# Metadata value types that are included in the hash
+_SERIALIZABLE = (str, int, float, bool, list, dict)
+
+def generate_content_hash(content: str, metadata: Union[Dict[str, Any], None] = None,
+                          algo: Union[str, None] = None) -> str:
     """Generate a hash for content and optional metadata.
     
     Args:
         content: The primary content to hash
         metadata: Optional metadata to include in the hash
+        algo: Hash algorithm to use, case-insensitive, defaults to HASH_ALGO
         
     Returns:
         A unique hash string
     """
-    # Start with content
-    hash_input = content
-    
-    # Add metadata if provided
-    if metadata:
-        # Extract only serializable metadata and sort keys for consistency
-        serializable_metadata = {}
-        for k, v in metadata.items():
-            # Skip any complex objects that can't be easily serialized
-            if isinstance(v, (str, int, float, bool, list, dict)):
-                serializable_metadata[k] = v
+    # Look up the algorithm on every call so a change of HASH_ALGO applies
+    # to memories with and without metadata alike
+    hasher_factory = _HASHERS[HASH_ALGO] if algo is None else get_hasher(algo)
+    
+    # Most memories are stored without metadata, so hash those directly
+    if not metadata:
+        return hasher_factory(content.encode('utf-8')).hexdigest()
+    
+    # Feed content and metadata to the hasher separately instead of
+    # concatenating them, which would copy the whole content string
+    hasher = hasher_factory(content.encode('utf-8'))
+    
+    # Extract only serializable metadata and sort keys for consistency,
+    # skipping any complex objects that can't be easily serialized
+    serializable_metadata = {k: v for k, v in metadata.items() if isinstance(v, _SERIALIZABLE)}
+    
+    # Add serialized metadata to hash input if there's any serializable data
+    if serializable_metadata:
+        hasher.update(json.dumps(serializable_metadata, sort_keys=True).encode('utf-8'))
+    
+    # Generate and return the hash
+    return hasher.hexdigest()
+
+def generate_content_hashes(items: Iterable[Tuple[str, Union[Dict[str, Any], None]]]) -> List[str]:
+    """Generate hashes for a batch of content and metadata pairs.
+    
+    Args:
+        items: Iterable of (content, metadata) tuples
         
-        # Add serialized metadata to hash input if there's any serializable data
-        if serializable_metadata:
-            hash_input += json.dumps(serializable_metadata, sort_keys=True)
+    Returns:
+        List of hash strings in the same order as items
+    """
+    return [generate_content_hash(content, metadata) for content, metadata in items]
+
+def content_hash_candidates(content: str, metadata: Union[Dict[str, Any], None] = None) -> List[str]:
+    """Generate the hashes content may be stored under with any available algorithm.
     
-    # Generate and return SHA-256 hash
-    return hashlib.sha256(hash_input.encode('utf-8')).hexdigest()
+    Duplicate checks and deletion by hash should match against all of
+    these, so memories hashed before a change of HASH_ALGO are still found.
+    
+    Args:
+        content: The primary content to hash
+        metadata: Optional metadata to include in the hash
+        
+    Returns:
+        List of hash strings, the one for HASH_ALGO first
+    """
+    algos = [HASH_ALGO] + [name for name in _HASHERS if name != HASH_ALGO]
+    return [generate_content_hash(content, metadata, algo) for algo in algos]
@@ -0,0 +1,103 @@
+"""
+MCP Memory Service
+Copyright (c) 2024 Heinrich Krupp
+Licensed under the MIT License. See LICENSE file in the project root for full license text.
+"""
+
+import numpy as np
+
+try:
+    import simsimd
+except ImportError:
+    simsimd = None
+
+# Allowance for floating point error in the similarity kernels themselves
+_KERNEL_SLACK = 1e-3
+
+def quantize_i8(v: np.ndarray) -> np.ndarray:
+    """Quantize vectors to int8 by scaling each one to its maximum absolute value.
+    
+    Args:
+        v: A vector of shape (dims,) or a batch of vectors of shape (n, dims)
+        
+    Returns:
+        int8 array of the same shape
+    """
+    v = np.asarray(v, dtype=np.float32)
+    if v.size == 0:
+        return v.astype(np.int8)
+    scale = np.max(np.abs(v), axis=-1, keepdims=True)
+    scale[scale == 0] = 1
+    return np.round(v * (127 / scale)).astype(np.int8)
+
+def cosine_similarity_i8(query_i8: np.ndarray, docs_i8: np.ndarray) -> np.ndarray:
+    """Compute the cosine similarity between an int8 query and each int8 document vector.
+    
+    Args:
+        query_i8: Quantized query embedding of shape (dims,)
+        docs_i8: Quantized document embeddings of shape (n, dims)
+        
+    Returns:
+        Array of n approximate similarity scores
+    """
+    if len(docs_i8) == 0:
+        return np.empty(0, dtype=np.float32)
+    if simsimd is not None:
+        distances = np.asarray(simsimd.cdist(query_i8[np.newaxis, :], docs_i8, metric="cosine"))
+        return 1 - distances[0]
+    # Accumulate in int32 so dot products of int8 values can't overflow
+    query = query_i8.astype(np.int32)
+    docs = docs_i8.astype(np.int32)
+    norms = np.sqrt((docs * docs).sum(axis=1) * float(query @ query))
+    return (docs @ query) / np.where(norms == 0, 1, norms)
+
+def i8_similarity_margin(v: np.ndarray) -> np.ndarray:
+    """Bound how far quantization can move each vector's cosine similarities.
+    
+    Rounding moves each component by at most half a quantization step, so
+    the quantized vector is within sqrt(dims) / 2 steps of the scaled
+    original. That turns its direction by at most arcsin of that distance
+    over the vector's norm, and since cosine is 1-Lipschitz in the angle,
+    the similarity to any other vector moves by at most the same amount.
+    
+    Args:
+        v: A vector of shape (dims,) or a batch of vectors of shape (n, dims)
+        
+    Returns:
+        Margin for each vector, of shape () or (n,)
+    """
+    v = np.asarray(v, dtype=np.float32)
+    if v.size == 0:
+        return np.zeros(v.shape[:-1], dtype=np.float32)
+    scale = np.max(np.abs(v), axis=-1)
+    norm = np.linalg.norm(v, axis=-1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # One quantization step is scale / 127 in the original units
+        relative_error = np.sqrt(v.shape[-1]) * scale / (254 * norm)
+    relative_error = np.where(norm > 0, relative_error, 1.0)
+    return np.arcsin(np.minimum(relative_error, 1.0))
+
+def i8_prefilter(query_vec: np.ndarray, doc_vecs: np.ndarray, threshold: float) -> np.ndarray:
+    """Find the documents whose similarity to the query could reach threshold.
+    
+    Similarities are computed on int8 copies of the vectors, and a document
+    is only ruled out if it stays below threshold even after allowing for
+    the quantization error of both vectors, so no true match is dropped.
+    
+    Quantizing costs more than a float32 similarity pass, so this only pays
+    off when the int8 copies of the documents are quantized once and kept,
+    not rebuilt from float32 vectors for every query.
+    
+    Args:
+        query_vec: Query embedding of shape (dims,)
+        doc_vecs: Document embeddings of shape (n, dims)
+        threshold: Minimum similarity a document needs to be kept
+        
+    Returns:
+        Boolean mask of the n documents to keep
+    """
+    if len(doc_vecs) == 0:
+        return np.zeros(0, dtype=bool)
+    approximate = cosine_similarity_i8(quantize_i8(query_vec), quantize_i8(doc_vecs))
+    margin = i8_similarity_margin(query_vec) + i8_similarity_margin(doc_vecs) + _KERNEL_SLACK
+    return approximate >= threshold - margin
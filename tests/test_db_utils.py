@@ -0,0 +1,117 @@
+import asyncio
+import json
+from datetime import datetime
+
+import numpy as np
+
+from mcp_memory_service.utils import db_utils
+from mcp_memory_service.utils.db_utils import STATS_CHUNK_SIZE, _parse_timestamp, _parse_timestamps, get_database_stats
+
+class PagedCollection:
+    """Minimal stand-in for a ChromaDB collection that serves get() in pages."""
+    
+    def __init__(self, documents, metadatas):
+        self.documents = documents
+        self.metadatas = metadatas
+        self.gets = []
+    
+    def count(self):
+        return len(self.documents)
+    
+    def get(self, include, limit, offset):
+        self.gets.append({"include": list(include), "limit": limit, "offset": offset})
+        end = offset + limit
+        return {
+            "ids": [f"id{i}" for i in range(offset, min(end, len(self.documents)))],
+            "documents": self.documents[offset:end] if "documents" in include else None,
+            "metadatas": self.metadatas[offset:end] if "metadatas" in include else None,
+        }
+
+class FakeStorage:
+    def __init__(self, documents, metadatas):
+        self.collection = PagedCollection(documents, metadatas)
+
+def _stats(storage, fields=None):
+    return asyncio.run(get_database_stats(storage, fields))
+
+def test_stats_edge_cases():
+    rows = [
+        ("abc", {"memory_type": "note", "tags": '["a", "b"]', "timestamp": "1700000000.5"}),
+        # A numeric 0 counts as missing
+        ("hello", {"memory_type": "fact", "tags": '["a"]', "timestamp": 0}),
+        ("", {"tags": "not json", "timestamp": "5"}),
+        ("xy", {"memory_type": "note", "tags": '[{"x": 1}, ["y"], "c"]', "timestamp": "inf"}),
+        ("z", {"memory_type": "note", "timestamp": "bad"}),
+        ("", {"memory_type": "fact", "tags": '{"a": 1}'}),
+    ]
+    storage = FakeStorage([doc for doc, _ in rows], [metadata for _, metadata in rows])
+    
+    assert _stats(storage) == {
+        "total_memories": 6,
+        "total_content_length": 11,
+        "avg_content_length": 11 / 6,
+        "memory_types": {"note": 3, "fact": 2, "": 1},
+        "tags": {"a": 2, "b": 1, "c": 1},
+        "oldest_memory": datetime.fromtimestamp(5).isoformat(),
+        "newest_memory": datetime.fromtimestamp(1700000000.5).isoformat(),
+        "collection_name": "memory_collection",
+        "embedding_model": "all-MiniLM-L6-v2",
+        "top_tags": {"a": 2, "b": 1, "c": 1},
+    }
+
+def test_top_tags_keep_first_seen_order_for_ties():
+    tags = [f"t{i}" for i in range(12)]
+    metadatas = [{"tags": json.dumps(tags)}] + [{"tags": json.dumps([tag])} for tag in ("t5", "t9", "t5")]
+    storage = FakeStorage(["doc"] * len(metadatas), metadatas)
+    
+    top_tags = _stats(storage, {"tags"})["top_tags"]
+    assert list(top_tags.items()) == [("t5", 3), ("t9", 2)] + [(tag, 1) for tag in ("t0", "t1", "t2", "t3", "t4", "t6", "t7", "t8")]
+
+def test_stats_across_chunk_boundaries():
+    for n in (STATS_CHUNK_SIZE, 2 * STATS_CHUNK_SIZE + 1):
+        documents = ["x" * (i % 3 + 1) for i in range(n)]
+        metadatas = [{"memory_type": "note" if i % 2 else "fact", "tags": json.dumps([f"t{i % 4}"]), "timestamp": str(1000 + i)}
+                     for i in range(n)]
+        storage = FakeStorage(documents, metadatas)
+        
+        stats = _stats(storage)
+        assert stats["total_memories"] == n
+        assert stats["total_content_length"] == sum(map(len, documents))
+        assert stats["avg_content_length"] == sum(map(len, documents)) / n
+        assert stats["memory_types"] == {"fact": (n + 1) // 2, "note": n // 2}
+        assert stats["tags"] == {f"t{k}": len(range(k, n, 4)) for k in range(4)}
+        assert stats["oldest_memory"] == datetime.fromtimestamp(1000).isoformat()
+        assert stats["newest_memory"] == datetime.fromtimestamp(1000 + n - 1).isoformat()
+        assert all(get["limit"] == STATS_CHUNK_SIZE for get in storage.collection.gets)
+        assert len(storage.collection.gets) == n // STATS_CHUNK_SIZE + 1
+
+def test_stats_fetch_only_needed_columns():
+    storage = FakeStorage(["abc"], [{"memory_type": "note"}])
+    assert _stats(storage, {"count"})["total_memories"] == 1
+    assert storage.collection.gets == []
+    
+    stats = _stats(storage, {"count", "content_length"})
+    assert stats["total_content_length"] == 3
+    assert [get["include"] for get in storage.collection.gets] == [["documents"]]
+    
+    assert "error" in _stats(storage, "count")
+    assert "error" in _stats(storage, {"bogus"})
+
+def test_parse_timestamps_matches_per_value_parsing():
+    cases = [
+        # Falsy values are missing, but a stored "0" string is a timestamp
+        [0, 0.0, "0", None, False, "1.5", 2, -1.0, "inf", "nan"],
+        ["", 0, "1700000000"],
+        [None, "bad", 3, {}],
+        [np.float64(0), "0.0", " 7 "],
+        [],
+    ]
+    for values in cases:
+        expected = np.array([_parse_timestamp(value) for value in values], dtype=np.float64)
+        np.testing.assert_array_equal(_parse_timestamps(values), expected)
+
+def test_parse_tags_keeps_only_strings():
+    assert db_utils.parse_tags('["a", 1, null, {"x": 1}, ["b"], "c"]') == ["a", "c"]
+    assert db_utils.parse_tags(["a", ["b"]]) == ["a"]
+    assert db_utils.parse_tags("not json") == []
+    assert db_utils.parse_tags(None) == []
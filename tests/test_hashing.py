@@ -0,0 +1,49 @@
+import hashlib
+
+import pytest
+
+from mcp_memory_service.utils import hashing
+from mcp_memory_service.utils.hashing import content_hash_candidates, generate_content_hash, generate_content_hashes, get_hasher
+
+# Digests produced by the original SHA-256 implementation, which stored
+# memories are keyed by
+GOLDEN_HASHES = [
+    ("hello", None, "2cf24dba5fb0a30e26e83b2ac5b9e29e1b161e5c1fa7425e73043362938b9824"),
+    ("", None, "e3b0c44298fc1c149afbf4c8996fb92427ae41e4649b934ca495991b7852b855"),
+    ("hello", {}, "2cf24dba5fb0a30e26e83b2ac5b9e29e1b161e5c1fa7425e73043362938b9824"),
+    ("h\u00e9llo w\u00f6rld \U0001f600",
+     {"tags": ["a", "b"], "type": "note", "n": 1, "f": 1.5, "b": True, "nested": {"z": 1, "a": [1, 2]}},
+     "683ebdbd3d32ef5d4ad76660e0e818feba0371e51974ff2297cb8811a59d2348"),
+    # Metadata with nothing serializable hashes like the content alone
+    ("content", {"skipped": None, "also": object()}, "ed7002b439e9ac845f22357d822bac1444730fbdb6016d3ec9432297b9ec9f73"),
+    ("content", {"t": "x", "skipped": (1, 2)}, "834914aef7d2ed139af48f0ca47fa53bb0294472fc77485a77e5f5c9a93c905a"),
+]
+
+def test_sha256_digests_unchanged(monkeypatch):
+    monkeypatch.setattr(hashing, "HASH_ALGO", "sha256")
+    for content, metadata, digest in GOLDEN_HASHES:
+        assert generate_content_hash(content, metadata) == digest
+        assert generate_content_hash(content, metadata, algo="sha256") == digest
+    assert generate_content_hashes((content, metadata) for content, metadata, _ in GOLDEN_HASHES) == [
+        digest for _, _, digest in GOLDEN_HASHES]
+
+def test_algo_is_case_insensitive():
+    assert generate_content_hash("abc", algo="SHA256") == generate_content_hash("abc", algo="sha256")
+    assert get_hasher("Sha256") is hashlib.sha256
+
+def test_unavailable_algo_raises_value_error():
+    with pytest.raises(ValueError, match="not available"):
+        generate_content_hash("abc", algo="md5")
+    with pytest.raises(ValueError):
+        generate_content_hash("abc", {"a": 1}, algo="md5")
+
+def test_candidates_find_hashes_from_every_algorithm(monkeypatch):
+    metadata = {"tags": ["a"], "type": "note"}
+    stored = generate_content_hash("abc", metadata, algo="sha256")
+    
+    # Switching the default algorithm must not lose memories stored earlier
+    monkeypatch.setitem(hashing._HASHERS, "sha512", hashlib.sha512)
+    monkeypatch.setattr(hashing, "HASH_ALGO", "sha512")
+    candidates = content_hash_candidates("abc", metadata)
+    assert candidates[0] == generate_content_hash("abc", metadata)
+    assert stored in candidates
@@ -0,0 +1,41 @@
+import numpy as np
+
+from mcp_memory_service.utils.quant import cosine_similarity_i8, i8_prefilter, quantize_i8
+
+def _cosine(query, docs):
+    return docs @ query / (np.linalg.norm(docs, axis=1) * np.linalg.norm(query))
+
+def test_prefilter_keeps_outlier_dimension_match():
+    # One large component makes the quantization step coarse for all others
+    rng = np.random.default_rng(0)
+    signs = rng.choice([-1.0, 1.0], size=383)
+    doc = np.concatenate([[127.0], 1.501 * signs]).astype(np.float32)
+    query = np.concatenate([[127.0], -3.0 * signs]).astype(np.float32)
+    
+    exact = _cosine(query, doc[np.newaxis, :])[0]
+    approximate = cosine_similarity_i8(quantize_i8(query), quantize_i8(doc[np.newaxis, :]))[0]
+    threshold = exact - 0.01
+    
+    # A fixed margin of 0.02 would drop this true match
+    assert approximate < threshold - 0.02
+    assert i8_prefilter(query, doc[np.newaxis, :], threshold)[0]
+
+def test_prefilter_never_drops_true_matches():
+    rng = np.random.default_rng(1)
+    query = rng.standard_normal(384).astype(np.float32)
+    # Mix documents close to the query with unrelated ones
+    docs = np.concatenate([
+        query + rng.standard_normal((200, 384)).astype(np.float32) * rng.uniform(0.1, 2.0, (200, 1)),
+        rng.standard_normal((200, 384)).astype(np.float32),
+    ]).astype(np.float32)
+    exact = _cosine(query, docs)
+    
+    for threshold in (0.1, 0.3, 0.5, 0.7, 0.9):
+        keep = i8_prefilter(query, docs, threshold)
+        assert keep[exact >= threshold].all()
+        # Unrelated documents should still be filtered out
+        assert not keep[exact < threshold - 0.5].any()
+
+def test_prefilter_empty():
+    query = np.ones(8, dtype=np.float32)
+    assert i8_prefilter(query, np.empty((0, 8), dtype=np.float32), 0.5).shape == (0,)